@@ -1,23 +1,89 @@
-from flask import Flask, request, jsonify
-from datetime import datetime, timedelta
-import pytz
+from flask import Flask, request
+from flask_caching import Cache
+from datetime import datetime, timedelta, timezone
+import zoneinfo
+from zoneinfo import ZoneInfo, available_timezones
+import os
+import mmap
 import time
-from collections import defaultdict, deque
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from collections import defaultdict, OrderedDict
+from functools import lru_cache
 from itertools import combinations
 import re
+import heapq
+import hashlib
 
+import numpy as np
+import orjson
+import redis
 import swisseph as swe
 from timezonefinder import TimezoneFinder
 from geopy.geocoders import Nominatim
+from geopy.adapters import RequestsAdapter
 from geopy.exc import GeocoderUnavailable, GeocoderTimedOut, GeocoderServiceError
-from pytz.exceptions import UnknownTimeZoneError
 
 app = Flask(__name__)
 
 # -------------------------
 # EPHEMERIS
 # -------------------------
-swe.set_ephe_path("./ephe")
+EPHE_PATH = "./ephe"
+_swe_local = threading.local()
+
+def ensure_ephemeris():
+    # Swiss Ephemeris hält Pfad/Dateien thread-lokal (TLS) -> pro Thread einmal setzen
+    if not getattr(_swe_local, "ready", False):
+        swe.set_ephe_path(EPHE_PATH)
+        _swe_local.ready = True
+        _swe_local.sid_mode = None
+
+# Bewusst kein ensure_ephemeris()/calc_ut beim Import: schon set_ephe_path öffnet
+# sepl/semo, unter --preload hielte der Master dann libswe-FILE*-Handles, und die
+# Worker erbten sie mit geteiltem Offset. Jeder rechnende Thread setzt den Pfad
+# selbst (before_request-Hook, Initializer von _chart_pool). Das Vorwärmen
+# übernehmen preload_ephemeris() (Page-Cache) und _TF (in_memory).
+
+# Dateien für 1800-2400 (praktisch alle Charts + Transite) beim Import in den
+# Page-Cache holen und gemappt halten -> kein Disk-I/O im ersten Request.
+# Unter `gunicorn --preload` teilen sich die Worker diese Seiten (COW).
+EPHE_PRELOAD_FILES = ("sepl_18.se1", "semo_18.se1", "seas_18.se1")
+_ephe_maps = []
+
+def preload_ephemeris():
+    # MAP_PRIVATE/PROT_READ gibt es nur auf Unix (Windows-Devbox: ohne Preload),
+    # MAP_POPULATE nur unter Linux (sonst reicht madvise bzw. der erste Zugriff)
+    if not hasattr(mmap, "MAP_PRIVATE"):
+        return
+    for fname in EPHE_PRELOAD_FILES:
+        path = os.path.join(EPHE_PATH, fname)
+        if not os.path.exists(path):
+            continue
+        with open(path, "rb") as f:
+            mm = mmap.mmap(
+                f.fileno(), 0,
+                flags=mmap.MAP_PRIVATE | getattr(mmap, "MAP_POPULATE", 0),
+                prot=mmap.PROT_READ
+            )
+        if hasattr(mm, "madvise") and hasattr(mmap, "MADV_WILLNEED"):
+            mm.madvise(mmap.MADV_WILLNEED)
+        _ephe_maps.append(mm)
+
+preload_ephemeris()
+
+# Unabhängige Chart-Berechnungen (z.B. Person A/B) laufen parallel,
+# damit Geocoding-Latenzen überlappen.
+# Pro Request bis zu 2 Builds (Person A/B): Pool = 2 x gunicorn --threads,
+# sonst warten Request-Threads hinter blockierenden Geocodes (Timeout 6 s).
+# Leerer Wert (Render erlaubt das) gilt wie bei ${GUNICORN_THREADS:-8} als nicht gesetzt
+GUNICORN_THREADS = max(1, int(os.environ.get("GUNICORN_THREADS") or 8))
+CHART_POOL_WORKERS = 2 * GUNICORN_THREADS
+_chart_pool = ThreadPoolExecutor(
+    max_workers=CHART_POOL_WORKERS,
+    thread_name_prefix="chart",
+    initializer=ensure_ephemeris
+)
 
 # -------------------------
 # CONSTANTS
@@ -62,6 +128,19 @@ BODIES = {
     "Mondknoten": swe.TRUE_NODE,   # True Node
 }
 
+# SoA-Sicht auf BODIES: gleicher Index in Namen, Codes und Ergebnis-Arrays
+BODY_NAMES = tuple(BODIES.keys())
+BODY_CODES = np.array(list(BODIES.values()), dtype=np.int32)
+BODY_IDX = {name: i for i, name in enumerate(BODY_NAMES)}
+_BODY_CODE_TUPLE = tuple(BODY_CODES.tolist())
+
+# Häusersystem-Buchstabe -> bytes für swe.houses (unbekannte Buchstaben rechnet swe als Placidus)
+_HSYS = {chr(c): bytes([c]) for c in range(128)}
+
+SID_MODE = swe.SIDM_FAGAN_BRADLEY
+FLAGS_TROPICAL = swe.FLG_SWIEPH
+FLAGS_SIDEREAL = swe.FLG_SWIEPH | swe.FLG_SIDEREAL
+
 ASPECTS = [
     ("Konjunktion", 0.0, 8.0),
     ("Sextil", 60.0, 6.0),
@@ -70,6 +149,9 @@ ASPECTS = [
     ("Opposition", 180.0, 8.0),
 ]
 
+ASPECT_EXACTS = np.array([exact for _, exact, _ in ASPECTS], dtype=np.float64)
+ASPECT_ORBS = np.array([orb for _, _, orb in ASPECTS], dtype=np.float64)
+
 # Für Aspektmuster brauchen wir zusätzlich Quincunx (150°)
 PATTERN_ASPECTS = [
     ("Sextil", 60.0, 4.0),
@@ -79,12 +161,51 @@ PATTERN_ASPECTS = [
     ("Quincunx", 150.0, 3.0),
 ]
 
+# -------------------------
+# JSON RESPONSES
+# -------------------------
+_ORJSON_OPTS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+def json_response(obj, status: int = 200):
+    # orjson statt jsonify: serialisiert direkt nach bytes, numpy-Werte inklusive
+    return app.response_class(orjson.dumps(obj, option=_ORJSON_OPTS), status=status, mimetype="application/json")
+
+# -------------------------
+# REDIS (OPTIONAL)
+# -------------------------
+# REDIS_URL gesetzt -> Caches über alle Worker geteilt, sonst nur prozesslokal
+REDIS_URL = os.environ.get("REDIS_URL")
+REDIS_PREFIX = "sternentyp:"
+_redis = redis.Redis.from_url(REDIS_URL, socket_timeout=0.5, socket_connect_timeout=0.5) if REDIS_URL else None
+
 # -------------------------
 # ABUSE-SCHUTZ (LIGHT)
 # -------------------------
 RATE_LIMIT = 90
 RATE_WINDOW = 60
-_ip_requests = defaultdict(lambda: deque())
+# GCRA: pro IP nur die "theoretical arrival time" (TAT); Burst bis RATE_LIMIT,
+# danach eine Anfrage je RATE_WINDOW / RATE_LIMIT Sekunden
+RATE_INTERVAL = RATE_WINDOW / RATE_LIMIT
+RATE_TRACK_MAX = 100_000  # harte Obergrenze gegen IP-Spraying
+_ip_tat = OrderedDict()  # ip -> TAT, älteste Aktualisierung vorne
+_ip_lock = threading.Lock()
+RATE_SWEEP_SECONDS = 5.0
+_ip_last_sweep = 0.0
+
+# Atomar in Redis (geteilt über Worker); Zeit aus Redis TIME, Werte in µs
+_GCRA_LUA = """
+local t = redis.call("TIME")
+local now = tonumber(t[1]) * 1000000 + tonumber(t[2])
+local interval = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local tat = tonumber(redis.call("GET", KEYS[1]) or now)
+if tat < now then tat = now end
+local new_tat = tat + interval
+if new_tat - window > now then return 0 end
+redis.call("SET", KEYS[1], string.format("%.0f", new_tat), "PX", math.ceil((new_tat - now) / 1000))
+return 1
+"""
+_gcra = _redis.register_script(_GCRA_LUA) if _redis is not None else None
 
 def get_client_ip():
     xff = request.headers.get("X-Forwarded-For", "")
@@ -92,52 +213,217 @@ def get_client_ip():
         return xff.split(",")[0].strip()
     return request.remote_addr or "unknown"
 
+def _rate_allow_local(ip: str) -> bool:
+    global _ip_last_sweep
+    now = time.monotonic()
+    with _ip_lock:
+        # abgelaufene Einträge vorne abräumen (entspricht einer frischen IP)
+        while _ip_tat and next(iter(_ip_tat.values())) <= now:
+            _ip_tat.popitem(last=False)
+        # Reihenfolge = letzte Aktualisierung, nicht TAT: hinter einer Burst-IP (TAT bis
+        # RATE_WINDOW in der Zukunft) bleiben abgelaufene Einträge liegen -> ab und zu komplett fegen
+        if _ip_tat and now - _ip_last_sweep >= RATE_SWEEP_SECONDS:
+            _ip_last_sweep = now
+            for k in [k for k, tat in _ip_tat.items() if tat <= now]:
+                del _ip_tat[k]
+        new_tat = max(_ip_tat.get(ip, now), now) + RATE_INTERVAL
+        if new_tat - RATE_WINDOW > now:
+            return False
+        _ip_tat[ip] = new_tat
+        _ip_tat.move_to_end(ip)
+        if len(_ip_tat) > RATE_TRACK_MAX:
+            _ip_tat.popitem(last=False)
+    return True
+
+def rate_allow(ip: str) -> bool:
+    if _gcra is not None:
+        try:
+            return bool(_gcra(keys=[f"{REDIS_PREFIX}rl:{ip}"],
+                              args=[int(RATE_INTERVAL * 1e6), int(RATE_WINDOW * 1e6)]))
+        except redis.RedisError as e:
+            app.logger.warning("Redis rate limit unavailable: %s", e)
+    return _rate_allow_local(ip)
+
 @app.before_request
 def rate_limit_guard():
-    ip = get_client_ip()
-    now = time.time()
-    q = _ip_requests[ip]
-    while q and (now - q[0]) > RATE_WINDOW:
-        q.popleft()
-    if len(q) >= RATE_LIMIT:
-        return jsonify({"error": "Too many requests. Please slow down for a moment. 💛"}), 429
-    q.append(now)
+    if not rate_allow(get_client_ip()):
+        return json_response({"error": "Too many requests. Please slow down for a moment. 💛"}, 429)
     return None
 
+@app.before_request
+def ephemeris_guard():
+    ensure_ephemeris()
+
 # -------------------------
 # GLOBAL ERROR HANDLER (damit du nicht blind 500 bekommst)
 # -------------------------
 @app.errorhandler(Exception)
 def handle_exception(e):
     app.logger.exception(e)
-    return jsonify({"error": "Internal server error", "detail": str(e)}), 500
+    return json_response({"error": "Internal server error", "detail": str(e)}, 500)
 
 # -------------------------
 # GEO CACHE (TTL)
 # -------------------------
 GEO_TTL_SECONDS = 7 * 24 * 3600
-_geo_cache = {}  # place -> (lat, lon, ts)
+# Abgelaufene Einträge bleiben so lange als Notreserve, falls Nominatim ausfällt
+# (Koordinaten von "Berlin" ändern sich nicht)
+GEO_STALE_SECONDS = 365 * 24 * 3600
+# "Nicht gefunden" kurz merken, damit Tippfehler Nominatim nicht dauernd treffen
+GEO_MISS_TTL_SECONDS = 3600
+GEO_MISS = object()
+GEO_CACHE_MAX = 10_000
+_geo_cache = OrderedDict()  # normalized place -> (lat, lon, ts), LRU-Reihenfolge
+_geo_lock = threading.Lock()
+
+def geo_cache_key(place: str) -> str:
+    return " ".join(place.split()).lower()
+
+def _geo_local_get(key: str, max_age: float):
+    with _geo_lock:
+        entry = _geo_cache.get(key)
+        if not entry:
+            return None
+        lat, lon, ts = entry
+        age = time.time() - ts
+        if lat is None:
+            if age > GEO_MISS_TTL_SECONDS:
+                _geo_cache.pop(key, None)
+                return None
+            return GEO_MISS
+        if age > GEO_STALE_SECONDS:
+            _geo_cache.pop(key, None)
+            return None
+        if age > max_age:
+            return None
+        _geo_cache.move_to_end(key)
+    return lat, lon
 
-def geo_cache_get(place: str):
-    entry = _geo_cache.get(place)
-    if not entry:
+def _geo_local_set(key: str, lat: float, lon: float, ts: float):
+    with _geo_lock:
+        _geo_cache[key] = (lat, lon, ts)
+        _geo_cache.move_to_end(key)
+        while len(_geo_cache) > GEO_CACHE_MAX:
+            _geo_cache.popitem(last=False)
+
+def geo_cache_get(place: str, max_age: float = GEO_TTL_SECONDS):
+    # L1 prozesslokal, L2 Redis (geteilt über Worker/Restarts)
+    key = geo_cache_key(place)
+    hit = _geo_local_get(key, max_age)
+    if hit or _redis is None:
+        return hit
+    try:
+        raw = _redis.get(f"{REDIS_PREFIX}geo:{key}")
+    except redis.RedisError as e:
+        app.logger.warning("Redis geo cache unavailable: %s", e)
+        return None
+    if not raw:
         return None
-    lat, lon, ts = entry
-    if (time.time() - ts) > GEO_TTL_SECONDS:
-        _geo_cache.pop(place, None)
+    if raw == b"-":
+        return GEO_MISS
+    lat, lon, ts = (float(v) for v in raw.split(b","))
+    if (time.time() - ts) > max_age:
         return None
+    _geo_local_set(key, lat, lon, ts)
     return lat, lon
 
 def geo_cache_set(place: str, lat: float, lon: float):
-    _geo_cache[place] = (lat, lon, time.time())
+    key = geo_cache_key(place)
+    ts = time.time()
+    _geo_local_set(key, lat, lon, ts)
+    if _redis is None:
+        return
+    try:
+        _redis.set(f"{REDIS_PREFIX}geo:{key}", f"{lat!r},{lon!r},{ts!r}", ex=GEO_STALE_SECONDS)
+    except redis.RedisError as e:
+        app.logger.warning("Redis geo cache unavailable: %s", e)
+
+def geo_cache_set_miss(place: str):
+    # Nie einen (auch abgelaufenen) Treffer überschreiben: der bleibt Fallback bei Geocoder-Ausfall
+    key = geo_cache_key(place)
+    with _geo_lock:
+        entry = _geo_cache.get(key)
+        if entry and entry[0] is not None:
+            return
+    if _redis is not None:
+        try:
+            # nx: Treffer in Redis bleibt stehen
+            if not _redis.set(f"{REDIS_PREFIX}geo:{key}", "-", ex=GEO_MISS_TTL_SECONDS, nx=True):
+                return
+        except redis.RedisError as e:
+            app.logger.warning("Redis geo cache unavailable: %s", e)
+    _geo_local_set(key, None, None, time.time())
+
+def geo_cache_get_stale(place: str):
+    # Fallback bei Geocoder-Ausfall: auch abgelaufene Einträge liefern
+    hit = geo_cache_get(place, max_age=GEO_STALE_SECONDS)
+    return None if hit is GEO_MISS else hit
+
+# -------------------------
+# RESPONSE CACHE
+# -------------------------
+# Redis wenn REDIS_URL gesetzt (geteilt über Worker), sonst prozesslokal
+RESPONSE_CACHE_TTL = 24 * 3600
+cache = Cache(app, config={
+    "CACHE_TYPE": "RedisCache" if REDIS_URL else "SimpleCache",
+    "CACHE_REDIS_URL": REDIS_URL,
+    "CACHE_KEY_PREFIX": REDIS_PREFIX,
+    "CACHE_DEFAULT_TIMEOUT": RESPONSE_CACHE_TTL,
+    "CACHE_THRESHOLD": 2048,
+})
+
+def cache_digest(obj) -> str:
+    # Ein Schema für alle Cache-Keys: kanonisches JSON (orjson, sortierte Keys) + blake2b,
+    # Key-Reihenfolge/Whitespace im Body spielen keine Rolle
+    body = orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+def request_body_cache_key():
+    return f"view:{request.path}:" + cache_digest(request.get_json(silent=True) or {})
+
+def _normalize_natal(natal):
+    # Ort nur in Groß/Klein und Whitespace vereinheitlichen; lat/lon bleiben exakt,
+    # Asc/MC/Häuser hängen direkt davon ab
+    if not isinstance(natal, dict):
+        return natal
+    natal = dict(natal)
+    if isinstance(natal.get("place"), str):
+        natal["place"] = geo_cache_key(natal["place"])
+    return natal
+
+def transits_cache_key():
+    # Route rechnet mit demselben normalisierten Natal -> Key und Antwort passen immer zusammen
+    payload = dict(request.get_json(silent=True) or {})
+    payload["natal"] = _normalize_natal(payload.get("natal"))
+    return "transits:" + cache_digest(payload)
+
+def cache_only_ok(rv):
+    # Fehler-Antworten (Status != 200) nie cachen
+    return getattr(rv, "status_code", None) == 200
 
 # -------------------------
 # TZ PARSING (FIX UTC+6 usw.)
 # -------------------------
+# TZ-Daten aus dem gepinnten tzdata-Paket statt vom System (wie früher bei pytz):
+# gleiche Historie auf jedem Host, auch vor 1901 / nach 2037
+zoneinfo.reset_tzpath(to=[])
+
+@lru_cache(maxsize=None)
+def _tz_names_ci():
+    # zoneinfo ist case-sensitiv; "europe/berlin" soll weiter funktionieren
+    # "Factory" ist ein tzdata-Platzhalter ohne echte Zone (pytz kannte ihn nicht)
+    return {n.lower(): n for n in available_timezones() if n != "Factory"}
+
+@lru_cache(maxsize=1024)
+def _zoneinfo(name: str):
+    # Nur bekannte Namen an ZoneInfo geben: "Europe" o.ä. wäre ein tzdata-Verzeichnis (IsADirectoryError)
+    canonical = _tz_names_ci().get(name.lower())
+    return ZoneInfo(canonical) if canonical else None
+
 def get_tzinfo(tz_name: str):
     """
     Akzeptiert:
-      - "Europe/Berlin", "Asia/Almaty" (pytz)
+      - "Europe/Berlin", "Asia/Almaty" (IANA, zoneinfo)
       - "UTC", "GMT", "Z"
       - "UTC+6", "UTC+06", "UTC+06:00", "UTC-3", "GMT+2"
       - "+06:00", "-0330", "+6"
@@ -152,7 +438,7 @@ def get_tzinfo(tz_name: str):
 
     # Common aliases
     if z.upper() in ("UTC", "GMT", "Z"):
-        return pytz.UTC
+        return timezone.utc
 
     # Patterns: UTC+6, UTC+06, UTC+06:00, GMT-3, etc.
     m = re.match(r'^(UTC|GMT)\s*([+-])\s*(\d{1,2})(?::?(\d{2}))?$', z, re.IGNORECASE)
@@ -163,7 +449,7 @@ def get_tzinfo(tz_name: str):
         if hh > 23 or mm > 59:
             return None
         total_min = sign * (hh * 60 + mm)
-        return pytz.FixedOffset(total_min)
+        return timezone(timedelta(minutes=total_min))
 
     # Patterns: +06:00, -0330, +6
     m2 = re.match(r'^([+-])\s*(\d{1,2})(?::?(\d{2}))?$', z)
@@ -174,13 +460,10 @@ def get_tzinfo(tz_name: str):
         if hh > 23 or mm > 59:
             return None
         total_min = sign * (hh * 60 + mm)
-        return pytz.FixedOffset(total_min)
+        return timezone(timedelta(minutes=total_min))
 
-    # Try pytz name
-    try:
-        return pytz.timezone(z)
-    except UnknownTimeZoneError:
-        return None
+    # Try IANA name
+    return _zoneinfo(z)
 
 # -------------------------
 # HELPERS
@@ -195,30 +478,48 @@ def deg_to_sign(deg: float):
         "ecliptic_longitude": round(deg, 6),
     }
 
+def sign_parts_batch(degs):
+    """(Zeichen-Index, Grad im Zeichen, Länge in [0, 360)) als Listen, Rechnung wie deg_to_sign."""
+    arr = np.remainder(np.asarray(degs, dtype=np.float64), 360.0)
+    idx = (arr // 30.0).astype(np.int64) % 12
+    sign_deg = np.remainder(arr, 30.0)
+    return idx.tolist(), sign_deg.tolist(), arr.tolist()
+
+def deg_to_sign_batch(degs) -> list:
+    """deg_to_sign für viele Längen auf einmal (gleiche Werte wie die Skalar-Version)."""
+    idx, sign_deg, arr = sign_parts_batch(degs)
+    return [
+        {"zeichen": ZODIAC_SIGNS[i], "grad": round(g, 6), "ecliptic_longitude": round(d, 6)}
+        for i, g, d in zip(idx, sign_deg, arr)
+    ]
+
 def norm360(x: float) -> float:
-    x = x % 360.0
-    if x < 0:
-        x += 360.0
-    return x
+    # Python-% liefert bei positivem Modul nie negative Werte
+    return x % 360.0
 
 def angle_diff(a: float, b: float) -> float:
-    d = abs(norm360(a) - norm360(b))
-    return min(d, 360.0 - d)
+    # Für normalisierte Längen ist |a-b| < 360 -> Modulo und min() nur im Ausnahmefall
+    d = abs(a - b)
+    if d >= 360.0:
+        d %= 360.0
+    return 360.0 - d if d > 180.0 else d
 
 def midpoint_angle(a: float, b: float) -> float:
-    a = norm360(a)
-    b = norm360(b)
+    # norm360 inline: drei Funktionsaufrufe weniger, gleiche Werte
+    a %= 360.0
+    b %= 360.0
     d = (b - a + 360.0) % 360.0
     if d > 180.0:
         d -= 360.0
-    return norm360(a + d / 2.0)
+    return (a + d / 2.0) % 360.0
 
-def pick_pattern_aspect(lon_a: float, lon_b: float):
-    d = angle_diff(lon_a, lon_b)
-    for asp_name, exact, orb in PATTERN_ASPECTS:
-        if abs(d - exact) <= orb:
-            return asp_name, round(d, 6), round(abs(d - exact), 6)
-    return None, None, None
+def midpoint_angle_batch(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """midpoint_angle elementweise (np.remainder rechnet wie Python-%, gleiche Werte)."""
+    a = np.remainder(a, 360.0)
+    b = np.remainder(b, 360.0)
+    d = np.remainder(b - a + 360.0, 360.0)
+    d = np.where(d > 180.0, d - 360.0, d)
+    return np.remainder(a + d / 2.0, 360.0)
 
 # -------------------------
 # ELEMENT / MODALITÄTEN BALANCE
@@ -227,32 +528,20 @@ BALANCE_BODIES = {
     "Sonne","Mond","Merkur","Venus","Mars","Jupiter","Saturn",
     "Uranus","Neptun","Pluto","Chiron","Lilith","Mondknoten","Südknoten"
 }
+_BALANCE_BODIES_SORTED = sorted(BALANCE_BODIES)
 
-def calc_element_modal_balance(bodies_out: dict):
+def calc_element_modal_balance(details: list):
+    """details: je gezähltem Body {"body", "zeichen", "element", "modalitaet"} (aus _assemble_bodies)."""
     elements = {"Feuer": 0, "Erde": 0, "Luft": 0, "Wasser": 0}
     modal = {"Kardinal": 0, "Fix": 0, "Veränderlich": 0}
-
-    details = []
-    for body, data in bodies_out.items():
-        if body not in BALANCE_BODIES:
-            continue
-        sign = data.get("zeichen")
-        meta = SIGN_META.get(sign)
-        if not meta:
-            continue
-        elements[meta["element"]] += 1
-        modal[meta["modalitaet"]] += 1
-        details.append({
-            "body": body,
-            "zeichen": sign,
-            "element": meta["element"],
-            "modalitaet": meta["modalitaet"]
-        })
+    for d in details:
+        elements[d["element"]] += 1
+        modal[d["modalitaet"]] += 1
 
     return {
         "elements": elements,
         "modalitaeten": modal,
-        "counted_bodies": sorted(list(BALANCE_BODIES)),
+        "counted_bodies": _BALANCE_BODIES_SORTED,
         "details": details
     }
 
@@ -266,16 +555,10 @@ STELLIUM_BODIES = {
     "Sonne","Mond","Merkur","Venus","Mars","Jupiter","Saturn",
     "Uranus","Neptun","Pluto","Chiron","Lilith","Mondknoten","Südknoten"
 }
+_STELLIUM_BODIES_SORTED = sorted(STELLIUM_BODIES)
 
-def calc_stelliums(bodies_out: dict, bodies_lon: dict):
-    by_sign = defaultdict(list)
-    for body, data in bodies_out.items():
-        if body not in STELLIUM_BODIES:
-            continue
-        sign = data.get("zeichen")
-        if sign:
-            by_sign[sign].append(body)
-
+def calc_stelliums(by_sign: dict, bodies_lon: dict):
+    """by_sign: Zeichen -> gezählte STELLIUM_BODIES (aus _assemble_bodies)."""
     stelliums = []
     for sign, bodies in by_sign.items():
         if len(bodies) >= STELLIUM_MIN_BODIES:
@@ -291,7 +574,7 @@ def calc_stelliums(bodies_out: dict, bodies_lon: dict):
     stelliums.sort(key=lambda x: x["count"], reverse=True)
     return {
         "min_bodies": STELLIUM_MIN_BODIES,
-        "counted_bodies": sorted(list(STELLIUM_BODIES)),
+        "counted_bodies": _STELLIUM_BODIES_SORTED,
         "orb_mode_deg": STELLIUM_ORB_DEG,
         "stelliums": stelliums
     }
@@ -303,105 +586,85 @@ PATTERN_BODIES = [
     "Sonne","Mond","Merkur","Venus","Mars","Jupiter","Saturn","Uranus","Neptun","Pluto"
 ]
 
-def build_aspect_map(bodies_lon: dict):
-    amap = {}
-    for a, b in combinations(PATTERN_BODIES, 2):
-        if a not in bodies_lon or b not in bodies_lon:
-            continue
-        asp, actual, orb = pick_pattern_aspect(bodies_lon[a], bodies_lon[b])
-        if asp:
-            amap[frozenset([a, b])] = {"aspect": asp, "actual_angle": actual, "orb": orb}
-    return amap
+@lru_cache(maxsize=None)
+def _index_combos(n: int, k: int) -> tuple:
+    # Höchstens len(PATTERN_BODIES) Punkte -> wenige feste Tupel, einmal pro Prozess
+    return tuple(combinations(range(n), k))
 
-def has_aspect(amap, a, b, aspect_name):
-    v = amap.get(frozenset([a, b]))
-    return v is not None and v["aspect"] == aspect_name
+def build_aspect_map(bodies_lon: dict):
+    """
+    Aspekte zwischen den vorhandenen PATTERN_BODIES als Matrix über deren Index:
+    (present, m) mit m[i][j] = Aspektname oder None.
+    """
+    present = [name for name in PATTERN_BODIES if name in bodies_lon]
+    lons = np.fromiter((bodies_lon[name] for name in present), dtype=np.float64, count=len(present))
+    diffs = angle_diff_matrix(lons, lons)
+    # erster Treffer in PATTERN_ASPECTS gewinnt (rückwärts schreiben)
+    m = np.full(diffs.shape, None, dtype=object)
+    for asp_name, exact, orb in reversed(PATTERN_ASPECTS):
+        m[np.abs(diffs - exact) <= orb] = asp_name
+    return present, m.tolist()
 
 def detect_patterns(bodies_lon: dict):
-    amap = build_aspect_map(bodies_lon)
-    patterns = []
-
-    # Grand Trine
-    for a, b, c in combinations(PATTERN_BODIES, 3):
-        if (a in bodies_lon and b in bodies_lon and c in bodies_lon and
-            has_aspect(amap, a, b, "Trigon") and
-            has_aspect(amap, a, c, "Trigon") and
-            has_aspect(amap, b, c, "Trigon")):
-            patterns.append({"pattern": "Grand Trine", "points": [a, b, c]})
-
-    # T-Square
-    for a, b, c in combinations(PATTERN_BODIES, 3):
-        if not (a in bodies_lon and b in bodies_lon and c in bodies_lon):
+    present, m = build_aspect_map(bodies_lon)
+    n = len(present)
+
+    def names(*idx):
+        return [present[k] for k in idx]
+
+    # Grand Trine, T-Square, Yod: ein Durchlauf über alle Tripel, alle Apex-Varianten
+    grand_trines, gt_out, tsq_out, yod_out = [], [], [], []
+    for a, b, c in _index_combos(n, 3):
+        ab, ac, bc = m[a][b], m[a][c], m[b][c]
+        if ab is None and ac is None and bc is None:
+            continue
+        if ab == "Trigon" and ac == "Trigon" and bc == "Trigon":
+            grand_trines.append((a, b, c))
+            gt_out.append({"pattern": "Grand Trine", "points": names(a, b, c)})
             continue
-        if (has_aspect(amap, a, b, "Opposition") and
-            has_aspect(amap, a, c, "Quadrat") and
-            has_aspect(amap, b, c, "Quadrat")):
-            patterns.append({"pattern": "T-Square", "points": [a, b, c], "apex": c})
-        if (has_aspect(amap, a, c, "Opposition") and
-            has_aspect(amap, a, b, "Quadrat") and
-            has_aspect(amap, c, b, "Quadrat")):
-            patterns.append({"pattern": "T-Square", "points": [a, b, c], "apex": b})
-        if (has_aspect(amap, b, c, "Opposition") and
-            has_aspect(amap, b, a, "Quadrat") and
-            has_aspect(amap, c, a, "Quadrat")):
-            patterns.append({"pattern": "T-Square", "points": [a, b, c], "apex": a})
+        # T-Square: Opposition + 2 Quadrate zum Apex
+        if ab == "Opposition" and ac == "Quadrat" and bc == "Quadrat":
+            tsq_out.append({"pattern": "T-Square", "points": names(a, b, c), "apex": present[c]})
+        if ac == "Opposition" and ab == "Quadrat" and bc == "Quadrat":
+            tsq_out.append({"pattern": "T-Square", "points": names(a, b, c), "apex": present[b]})
+        if bc == "Opposition" and ab == "Quadrat" and ac == "Quadrat":
+            tsq_out.append({"pattern": "T-Square", "points": names(a, b, c), "apex": present[a]})
+        # Yod: 2 Quincunx + 1 Sextil
+        if ab == "Sextil" and ac == "Quincunx" and bc == "Quincunx":
+            yod_out.append({"pattern": "Yod", "points": names(a, b, c), "apex": present[c]})
+        if ac == "Sextil" and ab == "Quincunx" and bc == "Quincunx":
+            yod_out.append({"pattern": "Yod", "points": names(a, b, c), "apex": present[b]})
+        if bc == "Sextil" and ab == "Quincunx" and ac == "Quincunx":
+            yod_out.append({"pattern": "Yod", "points": names(a, b, c), "apex": present[a]})
 
     # Mystic Rectangle
-    for a, b, c, d in combinations(PATTERN_BODIES, 4):
-        if not all(x in bodies_lon for x in [a, b, c, d]):
+    mr_out = []
+    for a, b, c, d in _index_combos(n, 4):
+        if m[a][c] != "Opposition" or m[b][d] != "Opposition":
             continue
-        if (has_aspect(amap, a, c, "Opposition") and
-            has_aspect(amap, b, d, "Opposition") and
-            has_aspect(amap, a, b, "Trigon") and
-            has_aspect(amap, c, d, "Trigon") and
-            has_aspect(amap, a, d, "Sextil") and
-            has_aspect(amap, b, c, "Sextil")):
-            patterns.append({"pattern": "Mystic Rectangle", "points": [a, b, c, d]})
-
-        if (has_aspect(amap, a, c, "Opposition") and
-            has_aspect(amap, b, d, "Opposition") and
-            has_aspect(amap, a, d, "Trigon") and
-            has_aspect(amap, c, b, "Trigon") and
-            has_aspect(amap, a, b, "Sextil") and
-            has_aspect(amap, c, d, "Sextil")):
-            patterns.append({"pattern": "Mystic Rectangle", "points": [a, b, c, d]})
+        if (m[a][b] == "Trigon" and m[c][d] == "Trigon" and
+            m[a][d] == "Sextil" and m[b][c] == "Sextil"):
+            mr_out.append({"pattern": "Mystic Rectangle", "points": names(a, b, c, d)})
+        if (m[a][d] == "Trigon" and m[c][b] == "Trigon" and
+            m[a][b] == "Sextil" and m[c][d] == "Sextil"):
+            mr_out.append({"pattern": "Mystic Rectangle", "points": names(a, b, c, d)})
 
     # Kite (Grand Trine + Opposition + 2 Sextile)
-    grand_trines = [p for p in patterns if p["pattern"] == "Grand Trine"]
-    for gt in grand_trines:
-        a, b, c = gt["points"]
-        for d in PATTERN_BODIES:
-            if d in (a, b, c) or d not in bodies_lon:
+    kite_out = []
+    for a, b, c in grand_trines:
+        for d in range(n):
+            if d in (a, b, c):
                 continue
-            if (has_aspect(amap, d, a, "Opposition") and
-                has_aspect(amap, d, b, "Sextil") and
-                has_aspect(amap, d, c, "Sextil")):
-                patterns.append({"pattern": "Kite", "points": [a, b, c, d], "opposition_to": a})
-            if (has_aspect(amap, d, b, "Opposition") and
-                has_aspect(amap, d, a, "Sextil") and
-                has_aspect(amap, d, c, "Sextil")):
-                patterns.append({"pattern": "Kite", "points": [a, b, c, d], "opposition_to": b})
-            if (has_aspect(amap, d, c, "Opposition") and
-                has_aspect(amap, d, a, "Sextil") and
-                has_aspect(amap, d, b, "Sextil")):
-                patterns.append({"pattern": "Kite", "points": [a, b, c, d], "opposition_to": c})
-
-    # Yod: 2 Quincunx + 1 Sextil
-    for a, b, c in combinations(PATTERN_BODIES, 3):
-        if not all(x in bodies_lon for x in [a, b, c]):
-            continue
-        if (has_aspect(amap, a, b, "Sextil") and
-            has_aspect(amap, a, c, "Quincunx") and
-            has_aspect(amap, b, c, "Quincunx")):
-            patterns.append({"pattern": "Yod", "points": [a, b, c], "apex": c})
-        if (has_aspect(amap, a, c, "Sextil") and
-            has_aspect(amap, a, b, "Quincunx") and
-            has_aspect(amap, c, b, "Quincunx")):
-            patterns.append({"pattern": "Yod", "points": [a, b, c], "apex": b})
-        if (has_aspect(amap, b, c, "Sextil") and
-            has_aspect(amap, b, a, "Quincunx") and
-            has_aspect(amap, c, a, "Quincunx")):
-            patterns.append({"pattern": "Yod", "points": [a, b, c], "apex": a})
+            da, db, dc = m[d][a], m[d][b], m[d][c]
+            if da == "Opposition" and db == "Sextil" and dc == "Sextil":
+                kite_out.append({"pattern": "Kite", "points": names(a, b, c, d), "opposition_to": present[a]})
+            if db == "Opposition" and da == "Sextil" and dc == "Sextil":
+                kite_out.append({"pattern": "Kite", "points": names(a, b, c, d), "opposition_to": present[b]})
+            if dc == "Opposition" and da == "Sextil" and db == "Sextil":
+                kite_out.append({"pattern": "Kite", "points": names(a, b, c, d), "opposition_to": present[c]})
+
+    # Reihenfolge wie bisher: Grand Trine, T-Square, Mystic Rectangle, Kite, Yod
+    patterns = gt_out + tsq_out + mr_out + kite_out + yod_out
 
     # Dedup
     seen = set()
@@ -422,32 +685,49 @@ def detect_patterns(bodies_lon: dict):
 # -------------------------
 # GEO + TZ
 # -------------------------
+# Einmal pro Prozess: Polygon-Daten im RAM, HTTP-Session wird wiederverwendet
+_TF = TimezoneFinder(in_memory=True)
+_GEOCODER = Nominatim(user_agent="sternentyp", timeout=6, adapter_factory=RequestsAdapter)
+
 def get_latlon_from_place(place_name: str):
     if not place_name:
         return None, ("Provide either (lat, lon) or place", 400)
 
+    not_found = ("Could not geocode place. Provide lat/lon for accuracy.", 400)
     cached = geo_cache_get(place_name)
+    if cached is GEO_MISS:
+        return None, not_found
     if cached:
         return cached, None
 
     try:
-        geolocator = Nominatim(user_agent="sternentyp", timeout=6)
-        loc = geolocator.geocode(place_name, language="de")
+        loc = _GEOCODER.geocode(place_name, language="de")
         if not loc:
-            return None, ("Could not geocode place. Provide lat/lon for accuracy.", 400)
+            geo_cache_set_miss(place_name)
+            return None, not_found
 
         lat, lon = float(loc.latitude), float(loc.longitude)
         geo_cache_set(place_name, lat, lon)
         return (lat, lon), None
 
     except (GeocoderUnavailable, GeocoderTimedOut, GeocoderServiceError):
-        return None, ("Geocoding service temporarily unavailable. Please provide lat/lon.", 503)
+        err = ("Geocoding service temporarily unavailable. Please provide lat/lon.", 503)
     except Exception:
-        return None, ("Geocoding failed unexpectedly. Please provide lat/lon.", 503)
+        err = ("Geocoding failed unexpectedly. Please provide lat/lon.", 503)
+
+    stale = geo_cache_get_stale(place_name)
+    if stale:
+        app.logger.warning("Geocoder down, serving stale coordinates for %r", place_name)
+        return stale, None
+    return None, err
+
+@lru_cache(maxsize=4096)
+def _timezone_at(lat: float, lon: float):
+    return _TF.timezone_at(lat=lat, lng=lon)
 
 def infer_timezone(lat, lon):
-    tf = TimezoneFinder()
-    return tf.timezone_at(lat=float(lat), lng=float(lon))
+    # ~100 m Raster: benachbarte Koordinaten teilen sich einen Cache-Eintrag
+    return _timezone_at(round(float(lat), 3), round(float(lon), 3))
 
 def parse_input_datetime(date_str: str, time_str: str, tz_name: str):
     tz = get_tzinfo(tz_name)
@@ -455,14 +735,20 @@ def parse_input_datetime(date_str: str, time_str: str, tz_name: str):
         raise ValueError(f"Unknown timezone: {tz_name}")
 
     naive_local = datetime.fromisoformat(f"{date_str}T{time_str}:00")
+    aware_local = naive_local.replace(tzinfo=tz)
+    if isinstance(tz, timezone):
+        # UTC / feste Offsets: keine Sommerzeit -> Prüf-Roundtrip überflüssig
+        return aware_local, aware_local.astimezone(timezone.utc)
 
-    # pytz.UTC & FixedOffset haben kein localize -> tzinfo setzen
-    if isinstance(tz, pytz.BaseTzInfo) and hasattr(tz, "localize"):
-        aware_local = tz.localize(naive_local, is_dst=None)
-    else:
-        aware_local = naive_local.replace(tzinfo=tz)
+    # Wie früher localize(is_dst=None): doppelte (Herbst) oder nicht
+    # existierende (Frühjahr) Ortszeiten ablehnen statt still zu raten
+    utc_dt = aware_local.astimezone(timezone.utc)
+    if utc_dt.astimezone(tz).replace(tzinfo=None) != naive_local:
+        raise ValueError(f"Non-existent local time (DST change): {date_str} {time_str} {tz_name}")
+    if aware_local.utcoffset() != aware_local.replace(fold=1).utcoffset():
+        raise ValueError(f"Ambiguous local time (DST change): {date_str} {time_str} {tz_name}")
 
-    return aware_local, aware_local.astimezone(pytz.UTC)
+    return aware_local, utc_dt
 
 def jd_ut_from_utc(utc_dt: datetime) -> float:
     return swe.julday(
@@ -472,27 +758,24 @@ def jd_ut_from_utc(utc_dt: datetime) -> float:
 
 def zodiac_flags(zodiac: str):
     if zodiac == "sidereal":
-        swe.set_sid_mode(swe.SIDM_FAGAN_BRADLEY, 0, 0)
-        return swe.FLG_SWIEPH | swe.FLG_SIDEREAL
-    return swe.FLG_SWIEPH
-
-def calc_body_lon_meta(jd_ut: float, body_const: int, flags: int):
-    xx, _ = swe.calc_ut(jd_ut, body_const, flags)
-    lon = float(xx[0]) % 360.0
-    speed_lon = float(xx[3])
-    return lon, speed_lon
+        # sid_mode ist thread-lokaler libswe-Zustand -> nur setzen, wenn noch nicht aktiv
+        if getattr(_swe_local, "sid_mode", None) != SID_MODE:
+            swe.set_sid_mode(SID_MODE, 0, 0)
+            _swe_local.sid_mode = SID_MODE
+        return FLAGS_SIDEREAL
+    return FLAGS_TROPICAL
 
 def calc_bodies(jd_ut: float, flags: int):
-    out = {}
-    meta = {}
-    for name, p in BODIES.items():
-        lon, speed_lon = calc_body_lon_meta(jd_ut, p, flags)
-        out[name] = lon
-        meta[name] = {"speed_lon": round(speed_lon, 6), "retrograd": speed_lon < 0}
-    return out, meta
+    """
+    Alle BODY_NAMES zu einem Zeitpunkt.
+    Gibt (lons, speeds) als Arrays zurück, Index wie BODY_NAMES; lons in [0, 360).
+    """
+    calc_ut = swe.calc_ut
+    xx = np.array([calc_ut(jd_ut, code, flags)[0] for code in _BODY_CODE_TUPLE], dtype=np.float64)
+    return np.remainder(xx[:, 0], 360.0), xx[:, 3]
 
 def calc_houses(jd_ut: float, lat: float, lon: float, house_system: str):
-    hsys = str(house_system)[0].encode("ascii")
+    hsys = _HSYS.get(str(house_system)[:1], b"P")
     houses, ascmc = swe.houses(jd_ut, float(lat), float(lon), hsys)
     cusp_list = list(houses[1:13]) if len(houses) == 13 else list(houses[0:12])
     asc = ascmc[0]
@@ -500,52 +783,183 @@ def calc_houses(jd_ut: float, lat: float, lon: float, house_system: str):
     houses_out = {f"haus_{i}": cusp_list[i - 1] % 360.0 for i in range(1, 13)}
     return houses_out, asc % 360.0, mc % 360.0
 
-def planet_house(planet_lon: float, houses_out: dict):
-    cusps = [houses_out[f"haus_{i}"] for i in range(1, 13)]
-    base = cusps[0]
-    adj_cusps = [norm360(c - base) for c in cusps]
-    pl = norm360(planet_lon - base)
-
-    for i in range(12):
-        start = adj_cusps[i]
-        end = adj_cusps[(i + 1) % 12]
-        if i < 11:
-            if start <= pl < end:
-                return i + 1
+def house_layout(houses_out: dict):
+    """
+    Einmal pro Chart: Spitzen relativ zu Haus 1, aufsteigend in [0, 360).
+    Gibt (base, adj_cusps) zurück.
+    """
+    cusps = np.array([houses_out[f"haus_{i}"] for i in range(1, 13)], dtype=np.float64)
+    base = float(cusps[0])
+    return base, (cusps - base) % 360.0
+
+def planet_house(planet_lon: float, layout) -> int:
+    base, adj = layout
+    # adj[0] == 0 -> Ergebnis immer in 1..12, Haus 12 nimmt alles ab adj[11]
+    return int(np.searchsorted(adj, (planet_lon - base) % 360.0, side="right"))
+
+def assign_houses(lons: dict, layout) -> dict:
+    base, adj = layout
+    vals = np.fromiter(lons.values(), dtype=np.float64, count=len(lons))
+    idx = np.searchsorted(adj, (vals - base) % 360.0, side="right")
+    return dict(zip(lons.keys(), idx.tolist()))
+
+def _lon_row_at(jd: float, flags: int) -> tuple:
+    # JD außen, Bodies innen: swe cached Erde/Sonne pro Zeitpunkt,
+    # alle Bodies eines JD hintereinander sparen deren Neuberechnung
+    calc_ut = swe.calc_ut
+    return tuple(calc_ut(jd, code, flags)[0][0] for code in _BODY_CODE_TUPLE)
+
+@lru_cache(maxsize=16384)
+def _lon_row(jd: float, flags: int) -> tuple:
+    # Key ist der exakte JD (kein Runden auf die Stunde). Transit-Raster liegen auf vollen
+    # UTC-Stunden und werden als stunde / 24 gebaut -> gleiche Stunde, gleicher float,
+    # überlappende Fenster verschiedener Requests teilen sich die Zeilen (~11 Jahre à 6 h)
+    return _lon_row_at(jd, flags)
+
+def calc_lon_grid(jds: np.ndarray, names: list, flags: int) -> np.ndarray:
+    """
+    Längen aller Bodies über ein JD-Raster.
+    Ergebnis: shape (len(names), len(jds)), normalisiert auf [0, 360).
+    """
+    rows = []
+    for jd in jds.tolist():
+        # nur (nahezu) stündliche Punkte cachen, ausgewertet wird immer der exakte JD
+        h = jd * 24.0
+        rows.append(_lon_row(jd, flags) if abs(h - round(h)) < 1e-6 else _lon_row_at(jd, flags))
+    idx = [BODY_IDX[name] for name in names]
+    lons = np.array(rows, dtype=np.float64).reshape(jds.size, len(BODY_NAMES))[:, idx].T
+    return np.ascontiguousarray(np.remainder(lons, 360.0))
+
+def refine_peak(body: int, nat_lon: float, exact: float, jd_lo: float, jd_hi: float,
+                flags: int, tol_days: float = 1.0 / 1440.0):
+    """
+    Golden-Section-Suche nach dem kleinsten Orb in [jd_lo, jd_hi]
+    (Genauigkeit ~1 Minute). Gibt (jd, actual_angle, orb) zurück.
+    """
+    calc_ut = swe.calc_ut
+
+    def orb_at(jd):
+        return abs(angle_diff(calc_ut(jd, body, flags)[0][0], nat_lon) - exact)
+
+    inv_phi = (5 ** 0.5 - 1) / 2
+    a, b = jd_lo, jd_hi
+    c, d = b - inv_phi * (b - a), a + inv_phi * (b - a)
+    fc, fd = orb_at(c), orb_at(d)
+    while (b - a) > tol_days:
+        if fc < fd:
+            b, d, fd = d, c, fc
+            c = b - inv_phi * (b - a)
+            fc = orb_at(c)
         else:
-            if pl >= start or pl < adj_cusps[0]:
-                return 12
-    return 12
+            a, c, fc = c, d, fd
+            d = a + inv_phi * (b - a)
+            fd = orb_at(d)
+
+    jd = (a + b) / 2.0
+    actual = angle_diff(calc_ut(jd, body, flags)[0][0], nat_lon)
+    return jd, actual, abs(actual - exact)
 
-def aspects_between(set_a: dict, set_b: dict):
+def angle_diff_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Paarweise angle_diff: shape a.shape + b.shape, Werte in [0, 180]."""
+    d = np.abs(np.subtract.outer(a, b)) % 360.0
+    return np.minimum(d, 360.0 - d)
+
+def match_aspects(diffs: np.ndarray, wide: np.ndarray):
+    """
+    Nächstliegender Aspekt je Zelle + eine Orb-Prüfung. Bei Orbs <= 8° und
+    Aspekten >= 60° auseinander kann ohnehin nur der nächste passen.
+    wide: bool-Maske gleicher Shape wie diffs -> Orb mindestens 8°.
+    Gibt (Zell-Indizes..., asp_idx, delta, orb_limit) für alle Treffer zurück.
+    """
+    delta = np.abs(diffs[..., None] - ASPECT_EXACTS)
+    nearest = delta.argmin(axis=-1)
+    nearest_delta = np.take_along_axis(delta, nearest[..., None], axis=-1)[..., 0]
+    limit = np.where(wide, np.maximum(ASPECT_ORBS, 8.0)[nearest], ASPECT_ORBS[nearest])
+    cells = np.nonzero(nearest_delta <= limit)
+    return cells, nearest[cells], nearest_delta[cells], limit[cells]
+
+LUMINARIES = ("Sonne", "Mond")
+
+def _aspect_events(diffs, names_a, names_b, wide_names, labels):
+    # diffs: Winkelmatrix names_a x names_b, np.inf = Paar überspringen
+    lum_a = np.array([n in wide_names for n in names_a], dtype=bool)
+    lum_b = np.array([n in wide_names for n in names_b], dtype=bool)
+    wide = lum_a[:, None] | lum_b[None, :]
+
+    (rows, cols), asp_idx, deltas, limits = match_aspects(diffs, wide)
     events = []
-    for name_a, lon_a in set_a.items():
-        for name_b, lon_b in set_b.items():
-            if name_a == name_b and set_a is set_b:
-                continue
-            d = angle_diff(lon_a, lon_b)
-            for asp_name, exact, orb in ASPECTS:
-                orb_limit = orb
-                if name_a in ("Sonne", "Mond") or name_b in ("Sonne", "Mond"):
-                    orb_limit = max(orb_limit, 8.0)
-                if abs(d - exact) <= orb_limit:
-                    events.append({
-                        "aspect": asp_name,
-                        "exact_angle": exact,
-                        "actual_angle": round(d, 6),
-                        "orb": round(abs(d - exact), 6),
-                        "orb_limit": float(orb_limit),
-                        "body_1": name_a,
-                        "body_2": name_b
-                    })
-                    break
+    for i, j, k, delta, orb_limit in zip(rows.tolist(), cols.tolist(), asp_idx.tolist(),
+                                         deltas.tolist(), limits.tolist()):
+        asp_name, exact, _ = ASPECTS[k]
+        events.append({
+            "aspect": asp_name,
+            "exact_angle": exact,
+            "actual_angle": round(float(diffs[i, j]), 6),
+            "orb": round(delta, 6),
+            "orb_limit": float(orb_limit),
+            labels[0]: names_a[i],
+            labels[1]: names_b[j]
+        })
     events.sort(key=lambda x: x["orb"])
     return events
 
+def aspects_between(set_a: dict, set_b: dict, wide_names=LUMINARIES, labels=("body_1", "body_2")):
+    """Aspekte zwischen zwei Punkt-Sets. wide_names: Punkte mit Orb mindestens 8°; labels: Keys für die beiden Seiten."""
+    names_a, names_b = list(set_a.keys()), list(set_b.keys())
+    diffs = angle_diff_matrix(
+        np.fromiter(set_a.values(), dtype=np.float64, count=len(names_a)),
+        np.fromiter(set_b.values(), dtype=np.float64, count=len(names_b))
+    )
+    return _aspect_events(diffs, names_a, names_b, wide_names, labels)
+
+def aspects_within(keys: list, lons, wide_names=LUMINARIES) -> list:
+    """Aspekte innerhalb eines Sets (keys[i] <-> lons[i]), jedes Paar genau einmal."""
+    lons = np.asarray(lons, dtype=np.float64)
+    diffs = angle_diff_matrix(lons, lons)
+    # nur i < j: kein Aspekt mit sich selbst und keine Paare doppelt
+    diffs[np.tril_indices(len(keys))] = np.inf
+    return _aspect_events(diffs, keys, keys, wide_names, ("body_1", "body_2"))
+
 # -------------------------
 # CORE: BUILD CHART
 # -------------------------
-def build_chart(payload: dict):
+def _assemble_bodies(bodies_lon: dict, houses_out: dict):
+    """
+    Ein Durchlauf über die Bodies: Zeichen-Format, Haus, Balance-Details und
+    Stellium-Gruppen. Gibt (bodies_out, houses_fmt, planet_houses, details, by_sign).
+    """
+    names = list(bodies_lon.keys())
+    lons = list(bodies_lon.values())
+    n = len(names)
+    # Bodies + Häuser in einem Batch
+    idx, grad, arr = sign_parts_batch(lons + list(houses_out.values()))
+    base, adj = house_layout(houses_out)
+    house_idx = np.searchsorted(adj, (np.asarray(lons, dtype=np.float64) - base) % 360.0, side="right").tolist()
+
+    bodies_out, planet_houses, details = {}, {}, []
+    by_sign = defaultdict(list)
+    for k, name in enumerate(names):
+        sign = ZODIAC_SIGNS[idx[k]]
+        bodies_out[name] = {"zeichen": sign, "grad": round(grad[k], 6), "ecliptic_longitude": round(arr[k], 6)}
+        planet_houses[name] = house_idx[k]
+        if name in BALANCE_BODIES:
+            meta = SIGN_META[sign]
+            details.append({
+                "body": name,
+                "zeichen": sign,
+                "element": meta["element"],
+                "modalitaet": meta["modalitaet"]
+            })
+        if name in STELLIUM_BODIES:
+            by_sign[sign].append(name)
+
+    houses_fmt = {
+        h: {"zeichen": ZODIAC_SIGNS[i], "grad": round(g, 6), "ecliptic_longitude": round(d, 6)}
+        for h, i, g, d in zip(houses_out.keys(), idx[n:], grad[n:], arr[n:])
+    }
+    return bodies_out, houses_fmt, planet_houses, details, by_sign
+
+def _build_chart(payload: dict):
     date_str = payload.get("date")
     time_str = payload.get("time")
     place = payload.get("place")
@@ -585,7 +999,13 @@ def build_chart(payload: dict):
     flags = zodiac_flags(zodiac)
 
     houses_out, asc, mc = calc_houses(jd_ut, float(lat), float(lon), house_system)
-    bodies_lon, bodies_meta = calc_bodies(jd_ut, flags)
+    lons, speeds = calc_bodies(jd_ut, flags)
+    # Dicts erst hier am Übergang zu den namensbasierten Auswertungen
+    bodies_lon = dict(zip(BODY_NAMES, lons.tolist()))
+    bodies_meta = {
+        name: {"speed_lon": round(v, 6), "retrograd": v < 0}
+        for name, v in zip(BODY_NAMES, speeds.tolist())
+    }
 
     # Südknoten automatisch
     if "Mondknoten" in bodies_lon:
@@ -595,22 +1015,12 @@ def build_chart(payload: dict):
             "retrograd": bodies_meta.get("Mondknoten", {}).get("retrograd", False)
         }
 
-    bodies_out = {k: deg_to_sign(v) for k, v in bodies_lon.items()}
-    houses_fmt = {k: deg_to_sign(v) for k, v in houses_out.items()}
-    planet_houses = {k: planet_house(v, houses_out) for k, v in bodies_lon.items()}
+    bodies_out, houses_fmt, planet_houses, details, by_sign = _assemble_bodies(bodies_lon, houses_out)
 
-    aspects = aspects_between(bodies_lon, bodies_lon)
-    dedup, seen = [], set()
-    for a in aspects:
-        pair = tuple(sorted([a["body_1"], a["body_2"]])) + (a["aspect"],)
-        if pair in seen:
-            continue
-        seen.add(pair)
-        dedup.append(a)
-    aspects = dedup
+    aspects = aspects_within(list(bodies_lon.keys()), list(bodies_lon.values()))
 
-    balance = calc_element_modal_balance(bodies_out)
-    stelliums = calc_stelliums(bodies_out, bodies_lon)
+    balance = calc_element_modal_balance(details)
+    stelliums = calc_stelliums(by_sign, bodies_lon)
     patterns = detect_patterns(bodies_lon)
 
     result = {
@@ -639,100 +1049,183 @@ def build_chart(payload: dict):
     }
     return result, None
 
+CHART_CACHE_TTL = 24 * 3600
+
+def chart_cache_key(payload: dict) -> str:
+    return "chart:" + cache_digest(payload)
+
+def build_chart(payload: dict):
+    # Charts sind deterministisch -> Natal für /transits, /synastry, /composite nur einmal rechnen
+    try:
+        # orjson lehnt z.B. Integer > 64 Bit ab -> dann eben ungecacht rechnen
+        key = chart_cache_key(payload)
+    except TypeError:
+        key = None
+    try:
+        hit = cache.get(key) if key else None
+    except Exception as e:
+        app.logger.warning("Chart cache unavailable: %s", e)
+        hit = None
+    if hit is not None:
+        return hit, None
+
+    result, err = _build_chart(payload)
+    if key and not err:
+        try:
+            cache.set(key, result, timeout=CHART_CACHE_TTL)
+        except Exception as e:
+            app.logger.warning("Chart cache unavailable: %s", e)
+    return result, err
+
+def build_charts(*payloads):
+    # Gleiche Payloads (z.B. Self-Synastry) nur einmal rechnen
+    futures = []
+    for i, p in enumerate(payloads):
+        same = next((futures[j] for j in range(i) if payloads[j] == p), None)
+        futures.append(same or _chart_pool.submit(build_chart, p))
+    return [f.result() for f in futures]
+
 # -------------------------
 # ROUTES
 # -------------------------
 @app.route("/health", methods=["GET"])
 def health():
-    return jsonify({"status": "ok"})
+    return json_response({"status": "ok"})
 
 @app.route("/chart", methods=["POST"])
+@cache.cached(make_cache_key=request_body_cache_key, response_filter=cache_only_ok)
 def chart():
     payload = request.json or {}
     chart_result, err = build_chart(payload)
     if err:
         msg, code = err
-        return jsonify({"error": msg}), code
-    return jsonify(chart_result)
+        return json_response({"error": msg}, code)
+    return json_response(chart_result)
 
 @app.route("/transits", methods=["POST"])
+@cache.cached(make_cache_key=transits_cache_key, response_filter=cache_only_ok)
 def transits():
     payload = request.json or {}
-    natal = payload.get("natal")
+    natal = _normalize_natal(payload.get("natal"))
     if not natal:
-        return jsonify({"error": "Missing required field: natal"}), 400
+        return json_response({"error": "Missing required field: natal"}, 400)
 
     start_date = payload.get("start_date")
     end_date = payload.get("end_date")
     step_hours = int(payload.get("step_hours", 6))
+    refine = payload.get("refine")
+    if refine is None:
+        refine = False
 
     if not start_date or not end_date:
-        return jsonify({"error": "Missing required fields: start_date, end_date"}), 400
+        return json_response({"error": "Missing required fields: start_date, end_date"}, 400)
+    if step_hours < 1:
+        return json_response({"error": "step_hours must be >= 1"}, 400)
+    if not isinstance(refine, bool):
+        return json_response({"error": "refine must be true or false"}, 400)
 
-    natal_result, natal_err = build_chart(natal)
-    if natal_err:
-        msg, code = natal_err
-        return jsonify({"error": f"Natal error: {msg}"}), code
+    # Natal läuft parallel zum Transit-Raster (das nur Zodiac/Fenster braucht)
+    natal_future = _chart_pool.submit(build_chart, natal)
 
     zodiac = natal.get("zodiac", "tropical")
     flags = zodiac_flags(zodiac)
 
-    start_dt_utc = datetime.fromisoformat(start_date + "T00:00:00").replace(tzinfo=pytz.UTC)
-    end_dt_utc = datetime.fromisoformat(end_date + "T23:59:59").replace(tzinfo=pytz.UTC)
+    start_dt_utc = datetime.fromisoformat(start_date + "T00:00:00").replace(tzinfo=timezone.utc)
+    end_dt_utc = datetime.fromisoformat(end_date + "T23:59:59").replace(tzinfo=timezone.utc)
+
+    transit_bodies = payload.get("transit_bodies") or list(BODIES.keys())
+    tr_names = [n for n in dict.fromkeys(transit_bodies) if n in BODIES]
+
+    # Zeitraster in JD (statt datetime-Schleife)
+    span_s = (end_dt_utc - start_dt_utc).total_seconds()
+    n_steps = max(0, int(span_s // (step_hours * 3600)) + 1)
+    # stunde / 24 statt start + k * step: gleiche UTC-Stunde ergibt in jedem Fenster denselben JD
+    jds = (round(jd_ut_from_utc(start_dt_utc) * 24.0) + np.arange(n_steps) * step_hours) / 24.0
+    jd_end = jd_ut_from_utc(end_dt_utc)
+    trans_lons = calc_lon_grid(jds, tr_names, flags) if tr_names and n_steps else None
+
+    natal_result, natal_err = natal_future.result()
+    if natal_err:
+        msg, code = natal_err
+        return json_response({"error": f"Natal error: {msg}"}, code)
 
     natal_lons = {k: natal_result["bodies"][k]["ecliptic_longitude"] for k in natal_result["bodies"].keys()}
     natal_points = dict(natal_lons)
     natal_points["Aszendent"] = natal_result["ascendant"]["ecliptic_longitude"]
     natal_points["MC"] = natal_result["mc"]["ecliptic_longitude"]
-
-    transit_bodies = payload.get("transit_bodies") or list(BODIES.keys())
-
-    best = {}
-    t = start_dt_utc
-    while t <= end_dt_utc:
-        jd_ut = jd_ut_from_utc(t)
-        trans_lons = {}
-
-        for name in transit_bodies:
-            if name not in BODIES:
-                continue
-            lon, _speed = calc_body_lon_meta(jd_ut, BODIES[name], flags)
-            trans_lons[name] = lon
-
-        for tr_name, tr_lon in trans_lons.items():
-            for nat_name, nat_lon in natal_points.items():
-                d = angle_diff(tr_lon, nat_lon)
-                for asp_name, exact, orb in ASPECTS:
-                    orb_limit = orb
-                    if nat_name in ("Sonne", "Mond", "Aszendent", "MC") or tr_name in ("Sonne", "Mond"):
-                        orb_limit = max(orb_limit, 8.0)
-                    delta = abs(d - exact)
-                    if delta <= orb_limit:
-                        key = (tr_name, nat_name, asp_name)
-                        cur = best.get(key)
-                        if cur is None or delta < cur["orb"]:
-                            best[key] = {
-                                "type": "transit_aspect",
-                                "transit_body": tr_name,
-                                "natal_point": nat_name,
-                                "aspect": asp_name,
-                                "exact_angle": exact,
-                                "actual_angle": round(d, 6),
-                                "orb": round(delta, 6),
-                                "orb_limit": float(orb_limit),
-                                "peak_utc": t.isoformat()
-                            }
-                        break
-
-        t += timedelta(hours=step_hours)
-
-    events = list(best.values())
-    events.sort(key=lambda x: x["orb"])
+    nat_names = list(natal_points.keys())
+
+    # je (transit, natal, aspect) höchstens ein Treffer -> Liste statt dict.
+    # Einträge (orb, erster Treffer-Schritt, transit, natal, aspekt, event): Gleichstände
+    # bei orb in der Reihenfolge der alten Zeitschleife (erster Treffer, dann tr/nat)
+    best = []
+    if trans_lons is not None:
+        nat_arr = np.array([natal_points[n] for n in nat_names], dtype=np.float64)
+
+        # (transit, step, natal)
+        diff = angle_diff_matrix(trans_lons, nat_arr)
+
+        tr_wide = np.array([n in LUMINARIES for n in tr_names])
+        nat_wide = np.array([n in LUMINARIES + ("Aszendent", "MC") for n in nat_names])
+        wide = tr_wide[:, None] | nat_wide[None, :]
+
+        for a, (asp_name, exact, orb) in enumerate(ASPECTS):
+            orb_limit = np.where(wide, max(orb, 8.0), orb)
+            deltas = np.abs(diff - exact)
+            deltas[deltas > orb_limit[:, None, :]] = np.inf
+            peak = deltas.argmin(axis=1)
+            peak_delta = np.take_along_axis(deltas, peak[:, None, :], axis=1)[:, 0, :]
+            first_hit = np.isfinite(deltas).argmax(axis=1)
+            for i, j in zip(*np.nonzero(np.isfinite(peak_delta))):
+                k = int(peak[i, j])
+                tr_name, nat_name = tr_names[i], nat_names[j]
+                actual, delta = float(diff[i, k, j]), float(peak_delta[i, j])
+                peak_dt = start_dt_utc + timedelta(hours=step_hours * k)
+
+                if refine:
+                    # Jedes lokale Raster-Minimum liegt max. 1 Schritt neben einem
+                    # echten Minimum -> alle verfeinern, das beste gewinnt.
+                    # Nach dem letzten Rasterpunkt bis zum Fensterende suchen.
+                    series = deltas[i, :, j]
+                    padded = np.concatenate(([np.inf], series, [np.inf]))
+                    minima = np.nonzero(np.isfinite(series) &
+                                        (series <= padded[:-2]) & (series <= padded[2:]))[0]
+                    for m in minima.tolist():
+                        jd_lo = float(jds[max(m - 1, 0)])
+                        jd_hi = float(jds[m + 1]) if m + 1 < n_steps else jd_end
+                        jd_m, r_actual, r_delta = refine_peak(
+                            BODIES[tr_name], natal_points[nat_name], exact, jd_lo, jd_hi, flags
+                        )
+                        if r_delta < delta:
+                            actual, delta = r_actual, r_delta
+                            offset_s = round((jd_m - float(jds[0])) * 86400.0)
+                            peak_dt = start_dt_utc + timedelta(seconds=min(max(offset_s, 0), span_s))
+
+                orb_r = round(delta, 6)
+                best.append((orb_r, int(first_hit[i, j]), int(i), int(j), a, {
+                    "type": "transit_aspect",
+                    "transit_body": tr_name,
+                    "natal_point": nat_name,
+                    "aspect": asp_name,
+                    "exact_angle": exact,
+                    "actual_angle": round(actual, 6),
+                    "orb": orb_r,
+                    "orb_limit": float(orb_limit[i, j]),
+                    "peak_utc": peak_dt.isoformat()
+                }))
+
+    # Top-200 per Heap statt Voll-Sortierung; Tupel-Vergleich erreicht das dict nie,
+    # (transit, natal, aspekt) ist eindeutig
+    events = [e for *_, e in heapq.nsmallest(200, best)]
 
     hard = {"Quadrat", "Opposition", "Konjunktion"}
     heavy = {"Saturn", "Uranus", "Pluto"}
     personal = {"Sonne", "Mond", "Aszendent", "MC", "Merkur", "Venus", "Mars"}
-    tension_hits = [e for e in events if e["aspect"] in hard and e["transit_body"] in heavy and e["natal_point"] in personal]
+    # Score zählt weiterhin alle Treffer, nicht nur die Top-200
+    tension_hits = [e for *_, e in sorted(
+        h for h in best
+        if h[-1]["aspect"] in hard and h[-1]["transit_body"] in heavy and h[-1]["natal_point"] in personal
+    )]
     tension_score = min(100, len(tension_hits) * 12)
 
     out = {
@@ -748,31 +1241,31 @@ def transits():
         "window": {
             "start_date": start_date,
             "end_date": end_date,
-            "step_hours": step_hours
+            "step_hours": step_hours,
+            "refine": refine
         },
-        "events": events[:200],
+        "events": events,
         "tension_score": tension_score,
         "tension_highlights": tension_hits[:25]
     }
-    return jsonify(out)
+    return json_response(out)
 
 @app.route("/synastry", methods=["POST"])
+@cache.cached(make_cache_key=request_body_cache_key, response_filter=cache_only_ok)
 def synastry():
     payload = request.json or {}
     person_a = payload.get("person_a")
     person_b = payload.get("person_b")
     if not person_a or not person_b:
-        return jsonify({"error": "Missing required fields: person_a, person_b"}), 400
+        return json_response({"error": "Missing required fields: person_a, person_b"}, 400)
 
-    a_chart, a_err = build_chart(person_a)
+    (a_chart, a_err), (b_chart, b_err) = build_charts(person_a, person_b)
     if a_err:
         msg, code = a_err
-        return jsonify({"error": f"Person A error: {msg}"}), code
-
-    b_chart, b_err = build_chart(person_b)
+        return json_response({"error": f"Person A error: {msg}"}, code)
     if b_err:
         msg, code = b_err
-        return jsonify({"error": f"Person B error: {msg}"}), code
+        return json_response({"error": f"Person B error: {msg}"}, code)
 
     a_lons = {k: a_chart["bodies"][k]["ecliptic_longitude"] for k in a_chart["bodies"].keys()}
     b_lons = {k: b_chart["bodies"][k]["ecliptic_longitude"] for k in b_chart["bodies"].keys()}
@@ -785,32 +1278,12 @@ def synastry():
     b_points["Aszendent"] = b_chart["ascendant"]["ecliptic_longitude"]
     b_points["MC"] = b_chart["mc"]["ecliptic_longitude"]
 
-    syn_aspects = []
-    for a_name, a_lon in a_points.items():
-        for b_name, b_lon in b_points.items():
-            d = angle_diff(a_lon, b_lon)
-            for asp_name, exact, orb in ASPECTS:
-                orb_limit = orb
-                if a_name in ("Sonne", "Mond", "Aszendent", "MC") or b_name in ("Sonne", "Mond", "Aszendent", "MC"):
-                    orb_limit = max(orb_limit, 8.0)
-                delta = abs(d - exact)
-                if delta <= orb_limit:
-                    syn_aspects.append({
-                        "aspect": asp_name,
-                        "exact_angle": exact,
-                        "actual_angle": round(d, 6),
-                        "orb": round(delta, 6),
-                        "orb_limit": float(orb_limit),
-                        "from_a": a_name,
-                        "to_b": b_name
-                    })
-                    break
-    syn_aspects.sort(key=lambda x: x["orb"])
+    syn_aspects = aspects_between(a_points, b_points,
+                                  wide_names=LUMINARIES + ("Aszendent", "MC"),
+                                  labels=("from_a", "to_b"))
 
     a_houses_raw = {k: a_chart["houses"][k]["ecliptic_longitude"] for k in a_chart["houses"].keys()}
-    overlays = {}
-    for b_name, b_lon in b_lons.items():
-        overlays[b_name] = planet_house(b_lon, a_houses_raw)
+    overlays = assign_houses(b_lons, house_layout(a_houses_raw))
 
     out = {
         "person_a": {
@@ -834,60 +1307,94 @@ def synastry():
         "synastry_aspects": syn_aspects[:200],
         "b_planets_in_a_houses": overlays
     }
-    return jsonify(out)
+    return json_response(out)
 
-@app.route("/composite", methods=["POST"])
-def composite():
-    payload = request.json or {}
+def _composite_lons(chart: dict, keys: list):
+    """Längen in der Reihenfolge [*keys, Asc, MC]."""
+    bodies = chart["bodies"]
+    for k in keys:
+        yield bodies[k]["ecliptic_longitude"]
+    yield chart["ascendant"]["ecliptic_longitude"]
+    yield chart["mc"]["ecliptic_longitude"]
+
+def composite_pair(payload: dict):
+    """
+    Gemeinsamer Teil von /composite und /v2/composite.
+    Gibt ((keys, mid, comp_asc, comp_mc, aspects), None) oder (None, Fehler-Response);
+    mid sind die Composite-Längen der Bodies in der Reihenfolge von keys.
+    """
     person_a = payload.get("person_a")
     person_b = payload.get("person_b")
     if not person_a or not person_b:
-        return jsonify({"error": "Missing required fields: person_a, person_b"}), 400
+        return None, json_response({"error": "Missing required fields: person_a, person_b"}, 400)
+    for label, person in (("A", person_a), ("B", person_b)):
+        if not isinstance(person, dict):
+            return None, json_response({"error": f"Person {label} error: must be an object"}, 400)
 
-    a_chart, a_err = build_chart(person_a)
+    (a_chart, a_err), (b_chart, b_err) = build_charts(person_a, person_b)
     if a_err:
         msg, code = a_err
-        return jsonify({"error": f"Person A error: {msg}"}), code
-
-    b_chart, b_err = build_chart(person_b)
+        return None, json_response({"error": f"Person A error: {msg}"}, code)
     if b_err:
         msg, code = b_err
-        return jsonify({"error": f"Person B error: {msg}"}), code
+        return None, json_response({"error": f"Person B error: {msg}"}, code)
 
-    comp_lons = {}
-    for k in a_chart["bodies"].keys():
-        a_lon = a_chart["bodies"][k]["ecliptic_longitude"]
-        b_lon = b_chart["bodies"][k]["ecliptic_longitude"]
-        comp_lons[k] = midpoint_angle(a_lon, b_lon)
+    keys = list(a_chart["bodies"].keys())
+    # Bodies + Asc + MC in einem Batch: [*bodies, Asc, MC]
+    a_lons = np.fromiter(_composite_lons(a_chart, keys), dtype=np.float64, count=len(keys) + 2)
+    b_lons = np.fromiter(_composite_lons(b_chart, keys), dtype=np.float64, count=len(keys) + 2)
+    mid_all = midpoint_angle_batch(a_lons, b_lons)
+    mid = mid_all[:-2]
+    comp_asc, comp_mc = mid_all[-2:].tolist()
 
-    comp_asc = midpoint_angle(
-        a_chart["ascendant"]["ecliptic_longitude"],
-        b_chart["ascendant"]["ecliptic_longitude"]
-    )
-    comp_mc = midpoint_angle(
-        a_chart["mc"]["ecliptic_longitude"],
-        b_chart["mc"]["ecliptic_longitude"]
-    )
+    comp_aspects = aspects_within(keys, mid)
+    return (keys, mid, comp_asc, comp_mc, comp_aspects), None
 
-    comp_aspects = aspects_between(comp_lons, comp_lons)
-    dedup, seen = [], set()
-    for a in comp_aspects:
-        pair = tuple(sorted([a["body_1"], a["body_2"]])) + (a["aspect"],)
-        if pair in seen:
-            continue
-        seen.add(pair)
-        dedup.append(a)
+COMPOSITE_NOTE = "Composite is calculated via midpoints of longitudes (bodies + Asc/MC). Houses are not computed here."
+
+@app.route("/composite", methods=["POST"])
+@cache.cached(make_cache_key=request_body_cache_key, response_filter=cache_only_ok)
+def composite():
+    data, err = composite_pair(request.json or {})
+    if err:
+        return err
+    keys, mid, comp_asc, comp_mc, comp_aspects = data
 
     out = {
         "composite": {
             "ascendant": deg_to_sign(comp_asc),
             "mc": deg_to_sign(comp_mc),
-            "bodies": {k: deg_to_sign(v) for k, v in comp_lons.items()},
-            "aspects": dedup[:200]
+            "bodies": dict(zip(keys, deg_to_sign_batch(mid))),
+            "aspects": comp_aspects[:200]
+        },
+        "note": COMPOSITE_NOTE
+    }
+    return json_response(out)
+
+@app.route("/v2/composite", methods=["POST"])
+@cache.cached(make_cache_key=request_body_cache_key, response_filter=cache_only_ok)
+def composite_v2():
+    # Kompaktes Schema: Punkte als [name, zeichen_index, grad], Index in "signs"
+    data, err = composite_pair(request.json or {})
+    if err:
+        return err
+    keys, mid, comp_asc, comp_mc, comp_aspects = data
+
+    idx, sign_deg, _ = sign_parts_batch([*mid.tolist(), comp_asc, comp_mc])
+    points = [[name, i, round(g, 6)] for name, i, g in zip([*keys, "Aszendent", "MC"], idx, sign_deg)]
+
+    out = {
+        "signs": ZODIAC_SIGNS,
+        "composite": {
+            "ascendant": points[-2],
+            "mc": points[-1],
+            "bodies": points[:-2],
+            "aspects": comp_aspects[:200]
         },
-        "note": "Composite is calculated via midpoints of longitudes (bodies + Asc/MC). Houses are not computed here."
+        "note": COMPOSITE_NOTE
     }
-    return jsonify(out)
+    return json_response(out)
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    # Nur lokal; Produktion läuft über gunicorn (render.yaml). Debug nur mit FLASK_DEBUG=1
+    app.run(host="0.0.0.0", port=5000, debug=os.environ.get("FLASK_DEBUG") == "1", threaded=True)
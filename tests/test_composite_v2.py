@@ -0,0 +1,64 @@
+import pytest
+
+import app
+
+P1 = {"date": "1990-05-17", "time": "14:35", "lat": 52.52, "lon": 13.405, "timezone": "Europe/Berlin"}
+P2 = {"date": "1985-11-02", "time": "06:10", "lat": 40.7128, "lon": -74.006, "house_system": "K"}
+
+
+def _post(path, body):
+    return app.app.test_client().post(path, json=body)
+
+
+@pytest.fixture(scope="module")
+def both():
+    v1 = _post("/composite", {"person_a": P1, "person_b": P2})
+    v2 = _post("/v2/composite", {"person_a": P1, "person_b": P2})
+    assert v1.status_code == v2.status_code == 200
+    return v1.get_json(), v2.get_json()
+
+
+def test_schema(both):
+    _, v2 = both
+    assert set(v2) == {"signs", "composite", "note"}
+    assert v2["signs"] == app.ZODIAC_SIGNS
+    comp = v2["composite"]
+    assert set(comp) == {"ascendant", "mc", "bodies", "aspects"}
+    assert comp["ascendant"][0] == "Aszendent" and comp["mc"][0] == "MC"
+    for name, idx, grad in [comp["ascendant"], comp["mc"], *comp["bodies"]]:
+        assert isinstance(name, str)
+        assert 0 <= idx < 12
+        assert 0 <= grad < 30
+
+
+def test_matches_v1(both):
+    v1, v2 = both
+    c1, c2 = v1["composite"], v2["composite"]
+
+    def as_v1(point):
+        _, idx, grad = point
+        return {"zeichen": v2["signs"][idx], "grad": grad}
+
+    def strip(d):
+        return {"zeichen": d["zeichen"], "grad": d["grad"]}
+
+    assert [name for name, *_ in c2["bodies"]] == list(c1["bodies"])
+    assert [as_v1(p) for p in c2["bodies"]] == [strip(d) for d in c1["bodies"].values()]
+    assert as_v1(c2["ascendant"]) == strip(c1["ascendant"])
+    assert as_v1(c2["mc"]) == strip(c1["mc"])
+    assert c2["aspects"] == c1["aspects"]
+    assert v2["note"] == v1["note"]
+
+
+@pytest.mark.parametrize("body, error", [
+    ({}, "Missing required fields: person_a, person_b"),
+    ({"person_a": P1}, "Missing required fields: person_a, person_b"),
+    ({"person_a": "x", "person_b": P2}, "Person A error: must be an object"),
+    ({"person_a": P1, "person_b": [1, 2]}, "Person B error: must be an object"),
+    ({"person_a": P1, "person_b": {"date": "1985-11-02"}}, "Person B error: Missing required fields: date, time"),
+    ({"person_a": dict(P1, timezone="Mars/Olympus"), "person_b": P2}, "Person A error: "),
+])
+def test_bad_partner_is_400(body, error):
+    r = _post("/v2/composite", body)
+    assert r.status_code == 400
+    assert r.get_json()["error"].startswith(error)
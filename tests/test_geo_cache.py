@@ -0,0 +1,63 @@
+import time
+
+import pytest
+from geopy.exc import GeocoderUnavailable
+
+import app
+
+PLACE = "Berlin"
+LAT, LON = 52.52, 13.405
+
+
+class FlakyGeocoder:
+    """Liefert nacheinander die vorgegebenen Ergebnisse (Exception-Instanzen werden geworfen)."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+
+    def geocode(self, place, language=None):
+        r = self.results.pop(0)
+        if isinstance(r, Exception):
+            raise r
+        return r
+
+
+@pytest.fixture(params=["local", "redis"])
+def geo_env(request, monkeypatch):
+    monkeypatch.setattr(app, "_geo_cache", type(app._geo_cache)())
+    if request.param == "redis":
+        fakeredis = pytest.importorskip("fakeredis")
+        monkeypatch.setattr(app, "_redis", fakeredis.FakeRedis())
+    else:
+        monkeypatch.setattr(app, "_redis", None)
+
+
+def _seed_stale_entry():
+    old_ts = time.time() - app.GEO_TTL_SECONDS - 60
+    key = app.geo_cache_key(PLACE)
+    app._geo_local_set(key, LAT, LON, old_ts)
+    if app._redis is not None:
+        app._redis.set(f"{app.REDIS_PREFIX}geo:{key}", f"{LAT!r},{LON!r},{old_ts!r}")
+
+
+def test_not_found_keeps_stale_entry_for_fallback(geo_env, monkeypatch):
+    _seed_stale_entry()
+    # Provider-Hiccup: "nicht gefunden", danach Ausfall
+    monkeypatch.setattr(app, "_GEOCODER", FlakyGeocoder(None, GeocoderUnavailable("down")))
+
+    _, err = app.get_latlon_from_place(PLACE)
+    assert err is not None and err[1] == 400
+
+    latlon, err = app.get_latlon_from_place(PLACE)
+    assert err is None
+    assert latlon == (LAT, LON)
+
+
+def test_not_found_without_entry_is_cached(geo_env, monkeypatch):
+    monkeypatch.setattr(app, "_GEOCODER", FlakyGeocoder(None))
+
+    _, err = app.get_latlon_from_place(PLACE)
+    assert err[1] == 400
+    # zweiter Lookup kommt aus dem Negativ-Cache, ohne Geocoder-Aufruf
+    _, err = app.get_latlon_from_place(PLACE)
+    assert err[1] == 400
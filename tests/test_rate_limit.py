@@ -0,0 +1,33 @@
+import pytest
+
+import app
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(app.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(app, "_ip_tat", type(app._ip_tat)())
+    monkeypatch.setattr(app, "_ip_last_sweep", 0.0)
+    return now
+
+
+def test_expired_entries_behind_a_burst_are_swept(clock):
+    # Burst-IP vorne hat eine TAT weit in der Zukunft, die Einzel-Requests dahinter laufen früher ab
+    for _ in range(80):
+        assert app._rate_allow_local("burst")
+    for i in range(100):
+        clock[0] += 0.01
+        assert app._rate_allow_local(f"ip{i}")
+
+    clock[0] += app.RATE_SWEEP_SECONDS + 1
+    assert app._ip_tat["burst"] > clock[0]
+    app._rate_allow_local("late")
+    assert list(app._ip_tat) == ["burst", "late"]
+
+
+def test_limit_still_applies(clock):
+    allowed = sum(app._rate_allow_local("a") for _ in range(app.RATE_LIMIT + 10))
+    assert allowed < app.RATE_LIMIT + 10
+    clock[0] += app.RATE_WINDOW
+    assert app._rate_allow_local("a")
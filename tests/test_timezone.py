@@ -0,0 +1,27 @@
+import pytest
+
+import app
+
+
+@pytest.mark.parametrize("name", ["Europe", "America", "Factory", "Nope/X"])
+def test_unknown_timezone_is_rejected(name):
+    assert app.get_tzinfo(name) is None
+
+
+@pytest.mark.parametrize("name", ["Europe/Berlin", "europe/berlin", "Asia/Almaty"])
+def test_iana_timezone_is_accepted(name):
+    assert app.get_tzinfo(name) is not None
+
+
+@pytest.mark.parametrize("date, tz_name, offset", [
+    # vor 1901: Normalzeit aus den tzdata-Regeln, nicht mehr pytz' LMT (-4:56)
+    ("1890-06-01", "America/New_York", "-05:00"),
+    # LMT sekundengenau statt auf Minuten gerundet (+0:09)
+    ("1902-06-01", "Africa/Tunis", "+00:09:21"),
+    # nach 2037: Sommerzeit per POSIX-TZ-Regel statt Normalzeit
+    ("2045-07-01", "Europe/Berlin", "+02:00"),
+])
+def test_historic_and_future_offsets(date, tz_name, offset):
+    local, utc_dt = app.parse_input_datetime(date, "12:00", tz_name)
+    assert local.isoformat().endswith(offset)
+    assert local.replace(tzinfo=None) - utc_dt.replace(tzinfo=None) == local.utcoffset()
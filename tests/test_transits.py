@@ -0,0 +1,45 @@
+import pytest
+
+import app
+
+
+def _transits(natal, start_date, end_date):
+    c = app.app.test_client()
+    r = c.post("/transits", json={"natal": natal, "start_date": start_date, "end_date": end_date})
+    assert r.status_code == 200
+    return r.get_json()
+
+
+def _rows(events):
+    return [(e["transit_body"], e["natal_point"], e["aspect"], e["orb"]) for e in events]
+
+
+@pytest.fixture(scope="module")
+def node_ties():
+    natal = {"date": "1982-04-02", "time": "02:27", "lat": -4.001, "lon": -55.021, "timezone": "UTC"}
+    return _transits(natal, "2024-05-01", "2024-10-28")
+
+
+def test_tied_orbs_follow_natal_order_not_aspect_order(node_ties):
+    # Mondknoten/Südknoten stehen sich gegenüber -> gleiche Orbs, Trigon vs. Sextil
+    assert _rows(node_ties["events"])[6:8] == [
+        ("Saturn", "Mondknoten", "Trigon", 0.000882),
+        ("Saturn", "Südknoten", "Sextil", 0.000882),
+    ]
+
+
+def test_tied_orbs_follow_first_hit_before_transit_order():
+    # Merkur kommt zuerst in Orb, obwohl Sonne in der Body-Liste vorne steht
+    natal = {"date": "1986-06-11", "time": "22:22", "lat": 15.381, "lon": 36.572, "timezone": "UTC"}
+    rows = _rows(_transits(natal, "2024-04-01", "2024-07-28")["events"])
+    assert rows[37:39] == [
+        ("Merkur", "Mars", "Quadrat", 0.011165),
+        ("Sonne", "Mars", "Quadrat", 0.011165),
+    ]
+
+
+def test_events_sorted_by_orb(node_ties):
+    orbs = [e["orb"] for e in node_ties["events"]]
+    assert orbs == sorted(orbs)
+    tension = [e["orb"] for e in node_ties["tension_highlights"]]
+    assert tension == sorted(tension)